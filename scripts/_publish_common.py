@@ -0,0 +1,363 @@
+"""
+Shared helpers for the SwingSignal publishers (publish_report.py and
+publish_weekly.py): report validation, metadata extraction, file placement
+and archive.html updates.
+"""
+
+import mmap
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # optional: the stdlib parser is slower but equivalent here
+    from json import loads as json_loads
+
+
+# Resolved once so symlinked checkouts and relative invocations agree
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+REPORTS_DIR = PROJECT_ROOT / 'reports'
+WEEKLY_DIR = REPORTS_DIR / 'weekly'
+ARCHIVE_PATH = PROJECT_ROOT / 'archive.html'
+
+# Matches a single daily or weekly archive entry (with its indentation);
+# group 1 is the page it links to and group 2 its YYYY-MM-DD date.
+_ARCHIVE_ITEM_RE = re.compile(
+    rb'[ \t]*<a href="(index\.html|weekly\.html)\?date=([0-9-]{10})"[^>]*class="archive-item"[^>]*>.*?</a>',
+    re.DOTALL,
+)
+
+_MONTHS = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+)
+
+# One archive.html entry; shared by the daily and weekly sections so they stay aligned.
+_ARCHIVE_ITEM_TEMPLATE = (
+    '                    <a href="{page}?date={date}" class="archive-item" data-date="{date}">\n'
+    '                        <div>\n'
+    '                            <div class="archive-date">{display}</div>\n'
+    '                            <div class="archive-meta">\n'
+    '                                <span>{meta}</span>\n'
+    '                            </div>\n'
+    '                        </div>\n'
+    '                        <span class="archive-arrow">→</span>\n'
+    '                    </a>'
+)
+
+
+def buffer_stdout():
+    """Block-buffer stdout so a publisher's report goes out in one write at exit.
+    
+    Without this every print is its own write when stdout is unbuffered
+    (PYTHONUNBUFFERED, as is common in CI).
+    """
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
+
+
+def validate_json_structure(data):
+    """Validate that the JSON has the required structure.
+    
+    Supports two formats:
+    - Original: report_metadata (with generated_date), signals with symbol/action/score/trade_setup
+    - New: meta (with generated_at), signals with ticker/signal/analysis.tradeSetup
+    """
+    errors = []
+    
+    # Check metadata - accept either 'report_metadata' or 'meta'
+    has_metadata = 'report_metadata' in data or 'meta' in data
+    if not has_metadata:
+        errors.append("Missing 'report_metadata' or 'meta' field")
+    else:
+        meta = data.get('report_metadata') or data.get('meta')
+        # Check for either date field format
+        has_date = 'generated_date' in meta or 'generated_at' in meta
+        if not has_date:
+            errors.append("Missing date field (generated_date or generated_at)")
+        if 'total_signals' not in meta:
+            errors.append("Missing 'total_signals' in metadata")
+    
+    # Check signals
+    if 'signals' not in data:
+        errors.append("Missing 'signals' array")
+    elif not isinstance(data['signals'], list):
+        errors.append("'signals' must be an array")
+    elif len(data['signals']) > 0:
+        signal = data['signals'][0]
+        # Check for either format of required fields
+        has_symbol = 'symbol' in signal or 'ticker' in signal
+        has_action = 'action' in signal or 'signal' in signal
+        has_trade_setup = 'trade_setup' in signal or ('analysis' in signal and 'tradeSetup' in signal.get('analysis', {}))
+        
+        if not has_symbol:
+            errors.append("Signal missing required field: 'symbol' or 'ticker'")
+        if not has_action:
+            errors.append("Signal missing required field: 'action' or 'signal'")
+        if not has_trade_setup:
+            errors.append("Signal missing required field: 'trade_setup' or 'analysis.tradeSetup'")
+        # Note: 'score' is now optional (can use analysis.confidenceScore instead)
+    
+    return errors
+
+
+def get_metadata(data):
+    """Extract metadata from either format."""
+    meta = data.get('report_metadata') or data.get('meta')
+    
+    # Get date - handle both formats
+    date_str = meta.get('generated_date')
+    if not date_str and 'generated_at' in meta:
+        # Parse ISO format to YYYY-MM-DD
+        generated_at = meta['generated_at']
+        # Handle ISO format like "2025-12-28T06:29:37.692Z"
+        date_str = generated_at.split('T')[0]
+    
+    signal_count = meta.get('total_signals', 0)
+    
+    return date_str, signal_count
+
+
+def format_date_display(date_str):
+    """Convert YYYY-MM-DD to a display format like 'December 24, 2025'."""
+    # Fixed format, so split it directly rather than going through strptime/strftime
+    try:
+        year, month, day = date_str.split('-')
+    except (ValueError, AttributeError):
+        return date_str
+    # Accept what strptime('%Y-%m-%d') accepts; anything else is returned unchanged
+    if not (len(year) == 4 and 1 <= len(month) <= 2 and 1 <= len(day) <= 2
+            and (year + month + day).isascii() and (year + month + day).isdigit()):
+        return date_str
+    year, month, day = int(year), int(month), int(day)
+    if year < 1 or not 1 <= month <= 12 or not 1 <= day <= _days_in_month(year, month):
+        return date_str
+    return f'{_MONTHS[month - 1]} {day:02d}, {year:04d}'
+
+
+def _days_in_month(year, month):
+    """Return the number of days in a month, accounting for leap years."""
+    if month == 2:
+        leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+        return 29 if leap else 28
+    return 30 if month in (4, 6, 9, 11) else 31
+
+
+def validate_json_file(json_path):
+    """Parse and validate a report file, returning (date_str, signal_count, errors).
+    
+    Raises ValueError if the file is not valid JSON.
+    """
+    data = json_loads(Path(json_path).read_bytes())
+    
+    errors = validate_json_structure(data)
+    if errors:
+        return None, 0, errors
+    date_str, signal_count = get_metadata(data)
+    return date_str, signal_count, errors
+
+
+def load_report(json_path, reports_dir):
+    """Validate a report file and return (json_path, date_str, signal_count).
+    
+    reports_dir is where the report will be published. Exits with an error
+    message if the file is missing, invalid or already published there.
+    """
+    json_path = Path(json_path)
+    if not json_path.exists():
+        print(f"❌ Error: File not found: {json_path}")
+        sys.exit(1)
+    
+    print(f"\n📄 Input file: {json_path.name}")
+    
+    # Load and validate JSON
+    try:
+        date_str, signal_count, errors = validate_json_file(json_path)
+    except ValueError as e:
+        print(f"❌ Error: Invalid JSON - {e}")
+        sys.exit(1)
+    
+    if errors:
+        print("❌ Validation errors:")
+        for error in errors:
+            print(f"   - {error}")
+        sys.exit(1)
+    
+    print("  ✓ JSON structure validated")
+    
+    print(f"  ✓ Report date: {date_str}")
+    print(f"  ✓ Signal count: {signal_count}")
+    
+    # The source is deleted once published, so it must not already be one of the outputs
+    published = find_same_file(json_path, (reports_dir / f'{date_str}.json', reports_dir / 'latest.json'))
+    if published is not None:
+        print(f"❌ Error: {json_path} is already published as {published.relative_to(PROJECT_ROOT).as_posix()}")
+        sys.exit(1)
+    
+    return json_path, date_str, signal_count
+
+
+def build_archive_item(date_str, signal_count, weekly=False):
+    """Build the archive entry for a report.
+    
+    Returns (new_item, entry_key, section, marker): the entry's bytes, the
+    (page, date) groups _ARCHIVE_ITEM_RE yields for it, the section name
+    used in messages and the marker new entries are inserted after.
+    """
+    display_date = format_date_display(date_str)
+    if weekly:
+        page, section, marker = 'weekly.html', 'weekly archive', b'<!-- WEEKLY_ITEMS_START -->'
+        display_date = f'Week of {display_date}'
+    else:
+        page, section, marker = 'index.html', 'archive', b'<!-- ARCHIVE_ITEMS_START -->'
+    
+    new_item = _ARCHIVE_ITEM_TEMPLATE.format_map({
+        'page': page,
+        'date': date_str,
+        'display': display_date,
+        'meta': f'{signal_count} signals',
+    }).encode()
+    return new_item, (page.encode(), date_str.encode()), section, marker
+
+
+def add_archive_entry(content, date_str, signal_count, weekly=False, scanned=False, span=None):
+    """Return archive.html content with the entry for date_str added or updated.
+    
+    Works on the daily section, or the weekly one with weekly=True. Returns
+    content unchanged if the entry is already current or the marker is missing.
+    With scanned=True, span is the (start, end) of the existing entry found by
+    an earlier scan of content (None if there is none) and no regex is run.
+    """
+    new_item, entry_key, section, marker = build_archive_item(date_str, signal_count, weekly)
+    
+    if scanned:
+        replaced = span is not None
+        new_content = content[:span[0]] + new_item + content[span[1]:] if replaced else content
+    else:
+        replaced = False
+        
+        def replace_entry(m):
+            nonlocal replaced
+            if m.groups() != entry_key:
+                return m.group(0)
+            replaced = True
+            return new_item
+        
+        # Replace an existing entry for this page and date in the same pass that looks for it
+        new_content = _ARCHIVE_ITEM_RE.sub(replace_entry, content)
+    
+    if replaced:
+        if new_content == content:
+            # Republishing the same entry; nothing to change
+            print(f"  ✓ {section.capitalize()} entry for {date_str} already up to date")
+            return content
+        print(f"  ✓ Updated existing {section} entry for {date_str}")
+    else:
+        # Insert new entry after the section marker
+        idx = content.find(marker)
+        if idx < 0:
+            print(f"  ⚠ Warning: Could not find {section} marker in archive.html")
+            return content
+        end = idx + len(marker)
+        new_content = content[:end] + b'\n' + new_item + content[end:]
+        print(f"  ✓ Added new {section} entry for {date_str}")
+    
+    return new_content
+
+
+def update_archive_entry_in_place(archive_path, date_str, signal_count, weekly=False):
+    """Update an existing archive entry directly in a memory map of archive.html.
+    
+    Only handles the republish case where the entry already exists and the
+    new entry has the same length (e.g. the signal count keeps its width), so
+    no other byte moves and nothing needs to be read into memory.
+    
+    Returns (handled, span). When handled is False the file is untouched and
+    span is the existing entry's (start, end), or None if there is none, so
+    the caller can fall back to a full rewrite without scanning again.
+    """
+    new_item, entry_key, section, _ = build_archive_item(date_str, signal_count, weekly)
+    
+    with open(archive_path, 'r+b') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False, None
+        with mmap.mmap(f.fileno(), 0) as mm:
+            for m in _ARCHIVE_ITEM_RE.finditer(mm):
+                if m.groups() == entry_key:
+                    break
+            else:
+                return False, None
+            
+            start, end = m.span()
+            if mm[start:end] == new_item:
+                print(f"  ✓ {section.capitalize()} entry for {date_str} already up to date")
+                return True, (start, end)
+            if end - start != len(new_item):
+                return False, (start, end)
+            mm[start:end] = new_item
+            mm.flush()
+    
+    print(f"  ✓ Updated existing {section} entry for {date_str}")
+    return True, (start, end)
+
+
+def update_archive_html(archive_path, entries, weekly=False):
+    """Add or update archive.html entries for each (date_str, signal_count) pair.
+    
+    The file is read once and written at most once, however many entries
+    are applied. A single same-length update is patched in place instead.
+    """
+    if len(entries) == 1:
+        date_str, signal_count = entries[0]
+        handled, span = update_archive_entry_in_place(archive_path, date_str, signal_count, weekly)
+        if handled:
+            return
+        content = archive_path.read_bytes()
+        new_content = add_archive_entry(content, date_str, signal_count, weekly, scanned=True, span=span)
+    else:
+        content = archive_path.read_bytes()
+        new_content = content
+        for date_str, signal_count in entries:
+            new_content = add_archive_entry(new_content, date_str, signal_count, weekly)
+    
+    if new_content == content:
+        # Nothing changed; leave the file (and its mtime) untouched
+        return
+    
+    # Write to a sibling file and swap it in so a crash never leaves a torn archive
+    tmp = archive_path.with_suffix('.html.tmp')
+    tmp.write_bytes(new_content)
+    os.replace(tmp, archive_path)
+
+
+def find_same_file(path, candidates):
+    """Return the first existing candidate that is the same file as path (e.g. a hardlink), or None."""
+    for candidate in candidates:
+        if candidate.exists() and os.path.samefile(path, candidate):
+            return candidate
+    return None
+
+
+def link_or_copy(src, dst):
+    """Hardlink src to dst, replacing dst; copy instead if linking fails (e.g. across filesystems).
+
+    The link or copy is staged next to dst and moved into place with
+    os.replace, so dst is never missing or half-written. Nothing is done
+    when src and dst are already the same file.
+    """
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    
+    tmp = dst.with_name(dst.name + '.tmp')
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        # copyfile skips copymode and uses the platform fast path (sendfile etc.)
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    # rename() is a no-op if tmp and dst became links to one file in the meantime
+    tmp.unlink(missing_ok=True)